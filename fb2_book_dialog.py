@@ -3,65 +3,211 @@ from PyQt6.QtWidgets import (
     QPushButton, QProgressBar, QMessageBox
 )
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
+import html
 import os
+import shutil
+import subprocess
+import threading
 import zipfile
 import tempfile
-import xml.etree.ElementTree as ET
+from io import BytesIO
+
+try:
+    # lxml's C-based parser and XPath engine are several times faster than
+    # the pure-Python ElementTree path walker on large FB2 files
+    from lxml import etree as ET
+    _HAVE_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    _HAVE_LXML = False
+
+# Set namespaces for FB2 format
+FB2_NS_URI = 'http://www.gribuser.ru/xml/fictionbook/2.0'
+FB2_NS = {'fb': FB2_NS_URI}
+
+# Clark-notation tags skip the prefix resolution and namespace dict
+# lookup that find('.//fb:...', FB2_NS) pays on every call
+TAG_ANNOTATION = f'{{{FB2_NS_URI}}}annotation'
+TAG_BODY = f'{{{FB2_NS_URI}}}body'
+TAG_P = f'{{{FB2_NS_URI}}}p'
+
+# Resolve the optional external converters once per process; spawning a
+# process per conversion just to find out a tool is missing is wasted work
+_FB2CONVERTER = shutil.which('fb2converter')
+_FB2PDF = shutil.which('fb2pdf')
+_WKHTMLTOPDF = shutil.which('wkhtmltopdf')
+
+if _HAVE_LXML:
+    # One parser for every FB2 we touch: skips per-parse libxml2 setup,
+    # drops the unused ID table, tolerates oversized text nodes, and
+    # leaves entities unresolved on what is untrusted input
+    _FB2_PARSER = ET.XMLParser(huge_tree=True, collect_ids=False,
+                               resolve_entities=False)
+
+    # Compile the hot XPath expressions once per process; expression
+    # compilation and namespace registration dominate repeated find calls
+    _XP_BODY = ET.XPath('//fb:body', namespaces=FB2_NS)
+
+    def _find_body(root):
+        bodies = _XP_BODY(root)
+        return bodies[0] if bodies else None
+
+else:
+    _FB2_PARSER = None
+
+    def _find_body(root):
+        return root.find(f'.//{TAG_BODY}')
+
+def _body_paragraphs(body):
+    # {uri}localname iteration is a plain C tree walk in both lxml and
+    # ElementTree - no path compiler or namespace map involved
+    return body.iter(TAG_P)
+
+def _paragraphs_html(body):
+    """Render the body paragraphs as <p> markup for the converters."""
+    if body is None:
+        return ""
+    if _HAVE_LXML:
+        # Rebuild the paragraphs under a scratch element and let libxml2
+        # serialize (and escape) them in one C call instead of formatting
+        # and escaping per paragraph in Python
+        div = ET.Element('div')
+        for p in _body_paragraphs(body):
+            text = "".join(p.itertext())
+            if text:
+                ET.SubElement(div, 'p').text = text
+        if len(div) == 0:
+            return ""
+        markup = ET.tostring(div, encoding='unicode')
+        return markup[len('<div>'):-len('</div>')]
+    parts = []
+    append = parts.append
+    for p in _body_paragraphs(body):
+        text = "".join(p.itertext())
+        if text:
+            append(f"<p>{html.escape(text)}</p>")
+    return "\n".join(parts)
+
+# Keep outer archives open across dialog invocations: re-parsing the
+# central directory of a big library archive costs more than reading the
+# book itself. ZipFile is not thread-safe, so reads take the lock.
+_zip_cache = {}
+_zip_cache_lock = threading.Lock()
+
+def _open_archive(archive_path):
+    with _zip_cache_lock:
+        zip_file = _zip_cache.get(archive_path)
+        if zip_file is None:
+            zip_file = zipfile.ZipFile(archive_path, 'r')
+            if hasattr(os, 'posix_fadvise'):
+                # Book reads walk the archive front-to-back; tell the
+                # kernel so it can read ahead aggressively
+                try:
+                    os.posix_fadvise(zip_file.fp.fileno(), 0, 0,
+                                     os.POSIX_FADV_SEQUENTIAL)
+                except OSError:
+                    pass
+            _zip_cache[archive_path] = zip_file
+        return zip_file
 
 class ExtractThread(QThread):
     """Thread for extracting FB2 file from archive"""
     progress_signal = pyqtSignal(int)
-    finished_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal(object)
     error_signal = pyqtSignal(str)
-    
-    def __init__(self, archive_path, file_path, temp_dir):
+
+    def __init__(self, archive_path, file_path):
         super().__init__()
         self.archive_path = archive_path
         self.file_path = file_path
-        self.temp_dir = temp_dir
-    
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
     def run(self):
         try:
-            # Extract FB2 file from archive
-            with zipfile.ZipFile(self.archive_path, 'r') as zip_file:
+            # Decompress the FB2 straight into memory; writing it to a temp
+            # file first just to re-read it for parsing doubles the I/O
+            zip_file = _open_archive(self.archive_path)
+            with _zip_cache_lock:
                 # Get file info
                 file_info = zip_file.getinfo(self.file_path)
                 total_size = file_info.file_size
-                
-                # Set up extraction with progress reporting
-                extracted_path = os.path.join(self.temp_dir, "book.fb2")
-                
-                with open(extracted_path, 'wb') as out_file:
-                    with zip_file.open(self.file_path) as zip_content:
-                        chunk_size = 8192
-                        bytes_read = 0
-                        
-                        while True:
-                            chunk = zip_content.read(chunk_size)
-                            if not chunk:
-                                break
-                            
-                            out_file.write(chunk)
-                            bytes_read += len(chunk)
-                            
-                            # Update progress
-                            if total_size > 0:
-                                progress = int(bytes_read / total_size * 100)
+
+                buf = BytesIO()
+                with zip_file.open(self.file_path) as zip_content:
+                    # 1 MiB reads keep the syscall count low; emitting a
+                    # cross-thread signal per 8 KiB chunk swamps the event
+                    # loop, so only emit when the percentage changes
+                    chunk_size = 1 << 20
+                    bytes_read = 0
+                    last_progress = -1
+
+                    while True:
+                        if self._cancel.is_set():
+                            return
+                        chunk = zip_content.read(chunk_size)
+                        if not chunk:
+                            break
+
+                        buf.write(chunk)
+                        bytes_read += len(chunk)
+
+                        # Update progress
+                        if total_size > 0:
+                            progress = int(bytes_read / total_size * 100)
+                            if progress != last_progress:
+                                last_progress = progress
                                 self.progress_signal.emit(progress)
-                
-                self.finished_signal.emit(extracted_path)
-        
+
+                self.finished_signal.emit(buf.getvalue())
+
         except Exception as e:
             self.error_signal.emit(str(e))
 
+class ConvertThread(QThread):
+    """Thread for converting the extracted book to other formats"""
+    finished_signal = pyqtSignal(str, str)
+    error_signal = pyqtSignal(str, str)
+
+    def __init__(self, dialog, jobs):
+        super().__init__()
+        self.dialog = dialog
+        self.jobs = jobs
+
+    def run(self):
+        for fmt, output_path in self.jobs:
+            try:
+                if fmt == "epub":
+                    self.dialog.convert_to_epub(self.dialog.get_fb2_path(), output_path)
+                elif fmt == "pdf":
+                    self.dialog.convert_to_pdf(self.dialog.get_fb2_path(), output_path)
+                self.finished_signal.emit(fmt, output_path)
+            except Exception as e:
+                self.error_signal.emit(fmt, str(e))
+
 class BookDetailsDialog(QDialog):
+    # Emitted by the convert worker to request a QtWebEngine PDF render,
+    # which has to happen on the GUI thread
+    pdf_render_signal = pyqtSignal(str, str)
+
     def __init__(self, parent=None, book_data=None, archives_dir=None):
         super().__init__(parent)
         self.book_data = book_data
         self.archives_dir = archives_dir
         self.temp_dir = None
+        self.archive_path = None
+        self.fb2_bytes = None
         self.fb2_path = None
+        self._fb2_root = None
+        self._paragraphs_markup = None
         self.extract_thread = None
+        self.convert_thread = None
+        self._pdf_render_done = threading.Event()
+        self._pdf_render_ok = False
+        self._closing = False
+        self.pdf_render_signal.connect(self.render_pdf_with_webengine)
         
         self.setWindowTitle("Book Details")
         self.resize(600, 500)
@@ -149,48 +295,69 @@ class BookDetailsDialog(QDialog):
         if not os.path.exists(archive_path):
             self.content_text.setText(f"Error: Archive file not found: {archive_path}")
             return
+
+        self.archive_path = archive_path
         
         # Set up progress bar
         self.progress_bar.setValue(0)
         self.progress_bar.setVisible(True)
         
         # Start extraction thread
-        self.extract_thread = ExtractThread(archive_path, inner_zip, self.temp_dir)
+        self.extract_thread = ExtractThread(archive_path, inner_zip)
         self.extract_thread.progress_signal.connect(self.progress_bar.setValue)
         self.extract_thread.finished_signal.connect(self.extraction_finished)
         self.extract_thread.error_signal.connect(self.extraction_error)
         self.extract_thread.start()
     
-    def extraction_finished(self, file_path):
-        self.fb2_path = file_path
+    def extraction_finished(self, data):
+        self.fb2_bytes = data
         self.progress_bar.setVisible(False)
         
         try:
-            # Parse FB2 file and show preview
-            tree = ET.parse(file_path)
-            root = tree.getroot()
-            
-            # Try to extract book description or start of body
-            FB2_NS = {'fb': 'http://www.gribuser.ru/xml/fictionbook/2.0'}
-            
-            # Try to get annotation
-            annotation = root.find(".//fb:annotation", FB2_NS)
-            if annotation is not None:
-                text = "".join(annotation.itertext())
-                self.content_text.setText(f"Annotation:\n\n{text}")
-                return
-            
-            # If no annotation, try to get beginning of body
-            body = root.find(".//fb:body", FB2_NS)
-            if body is not None:
-                # Get first few paragraphs
-                paragraphs = body.findall(".//fb:p", FB2_NS)[:5]
-                text = "\n\n".join("".join(p.itertext()) for p in paragraphs if p.text)
+            # Stream the FB2 with iterparse instead of loading the whole
+            # tree: the annotation (or the first few body paragraphs) sits
+            # near the start of the file, so we can stop parsing early
+            in_body = False
+            paragraphs = []
+
+            if _HAVE_LXML:
+                context = ET.iterparse(BytesIO(data), events=('start', 'end'),
+                                       huge_tree=True, resolve_entities=False)
+            else:
+                context = ET.iterparse(BytesIO(data), events=('start', 'end'))
+
+            for event, elem in context:
+                if event == 'start':
+                    if elem.tag == TAG_BODY:
+                        in_body = True
+                    continue
+
+                if elem.tag == TAG_ANNOTATION:
+                    text = "".join(elem.itertext())
+                    self.content_text.setText(f"Annotation:\n\n{text}")
+                    return
+
+                if in_body and elem.tag == TAG_P:
+                    if elem.text:
+                        paragraphs.append("".join(elem.itertext()))
+                        if len(paragraphs) >= 5:
+                            break
+                    # Drop the consumed paragraph (and, under lxml, the
+                    # already-processed siblings before it). Clearing on
+                    # every end-event would gut a paragraph's inline
+                    # markup (emphasis etc.) before its <p> is joined.
+                    elem.clear()
+                    if _HAVE_LXML:
+                        while elem.getprevious() is not None:
+                            del elem.getparent()[0]
+
+            if paragraphs:
+                text = "\n\n".join(paragraphs)
                 self.content_text.setText(f"Preview:\n\n{text}")
                 return
-            
+
             self.content_text.setText("No preview available.")
-            
+
         except Exception as e:
             self.content_text.setText(f"Error parsing FB2 file: {str(e)}")
     
@@ -198,8 +365,31 @@ class BookDetailsDialog(QDialog):
         self.progress_bar.setVisible(False)
         self.content_text.setText(f"Error extracting book: {error_message}")
     
-    def extract_book(self):
+    def get_fb2_root(self):
+        """Parse the FB2 once and reuse the tree across converters."""
+        if self._fb2_root is None:
+            if _FB2_PARSER is not None:
+                self._fb2_root = ET.fromstring(self.fb2_bytes, _FB2_PARSER)
+            else:
+                self._fb2_root = ET.fromstring(self.fb2_bytes)
+        return self._fb2_root
+
+    def get_paragraphs_html(self):
+        """Render the body paragraphs once and share them across converters."""
+        if self._paragraphs_markup is None:
+            self._paragraphs_markup = _paragraphs_html(_find_body(self.get_fb2_root()))
+        return self._paragraphs_markup
+
+    def get_fb2_path(self):
+        """Write the in-memory FB2 to the temp directory on first use."""
         if not self.fb2_path:
+            self.fb2_path = os.path.join(self.temp_dir, "book.fb2")
+            with open(self.fb2_path, 'wb') as f:
+                f.write(self.fb2_bytes)
+        return self.fb2_path
+
+    def extract_book(self):
+        if not self.fb2_bytes:
             QMessageBox.warning(self, "Warning", "Book has not been extracted yet.")
             return
         
@@ -257,103 +447,104 @@ class BookDetailsDialog(QDialog):
         if not directory:
             return
         
-        # Process each format
-        import shutil
-        
-        for fmt in formats:
+        # The FB2 export is a plain write of the cached bytes; do it inline
+        if "fb2" in formats:
             try:
-                if fmt == "fb2":
-                    # Just copy the original FB2 file
-                    output_path = os.path.join(directory, f"{base_name}.fb2")
-                    shutil.copy2(self.fb2_path, output_path)
-                    QMessageBox.information(self, "Success", f"Book saved as FB2: {output_path}")
-                
-                elif fmt == "epub":
-                    # Convert FB2 to EPUB
-                    output_path = os.path.join(directory, f"{base_name}.epub")
-                    self.convert_to_epub(self.fb2_path, output_path)
-                    QMessageBox.information(self, "Success", f"Book converted to EPUB: {output_path}")
-                
-                elif fmt == "pdf":
-                    # Convert FB2 to PDF
-                    output_path = os.path.join(directory, f"{base_name}.pdf")
-                    self.convert_to_pdf(self.fb2_path, output_path)
-                    QMessageBox.information(self, "Success", f"Book converted to PDF: {output_path}")
-            
+                output_path = os.path.join(directory, f"{base_name}.fb2")
+                with open(output_path, 'wb') as f:
+                    f.write(self.fb2_bytes)
+                QMessageBox.information(self, "Success", f"Book saved as FB2: {output_path}")
             except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to save book as {fmt.upper()}: {str(e)}")
+                QMessageBox.critical(self, "Error", f"Failed to save book as FB2: {str(e)}")
+
+        # EPUB/PDF conversion is heavy; run it in a worker thread so the
+        # dialog stays responsive. Outputs newer than the source archive
+        # are already current, so skip rebuilding them
+        jobs = []
+        for fmt in formats:
+            if fmt == "fb2":
+                continue
+            output_path = os.path.join(directory, f"{base_name}.{fmt}")
+            if (self.archive_path and os.path.exists(output_path)
+                    and os.path.getmtime(output_path) >= os.path.getmtime(self.archive_path)):
+                QMessageBox.information(
+                    self, "Success",
+                    f"{fmt.upper()} is already up to date: {output_path}")
+                continue
+            jobs.append((fmt, output_path))
+        if not jobs:
+            return
+
+        self.extract_button.setEnabled(False)
+        self.content_text.setText("Converting book...")
+
+        self.convert_thread = ConvertThread(self, jobs)
+        self.convert_thread.finished_signal.connect(self.conversion_finished)
+        self.convert_thread.error_signal.connect(self.conversion_error)
+        self.convert_thread.finished.connect(self.conversions_done)
+        self.convert_thread.start()
+
+    def conversion_finished(self, fmt, output_path):
+        QMessageBox.information(self, "Success", f"Book converted to {fmt.upper()}: {output_path}")
+
+    def conversion_error(self, fmt, error_message):
+        QMessageBox.critical(self, "Error", f"Failed to save book as {fmt.upper()}: {error_message}")
+
+    def conversions_done(self):
+        self.extract_button.setEnabled(True)
     
     def closeEvent(self, event):
+        # Give a running conversion a bounded window to finish rather
+        # than blocking the GUI thread indefinitely. Unblock a worker
+        # parked on the GUI-thread PDF render first - its queued slot
+        # can never run while we sit here in closeEvent.
+        if self.convert_thread and self.convert_thread.isRunning():
+            self._closing = True
+            self._pdf_render_ok = False
+            self._pdf_render_done.set()
+            self.convert_thread.wait(5000)
+
         # Clean up temp directory
         if self.temp_dir and os.path.exists(self.temp_dir):
-            import shutil
             try:
                 shutil.rmtree(self.temp_dir)
             except:
                 pass
         
-        # Stop extraction thread if running
+        # Ask a running extraction to stop; terminate() would abort the
+        # thread mid-read and leak the archive handle
         if self.extract_thread and self.extract_thread.isRunning():
-            self.extract_thread.terminate()
-            self.extract_thread.wait()
+            self.extract_thread.cancel()
+            self.extract_thread.wait(2000)
         
         event.accept()
     
     def convert_to_epub(self, fb2_path, output_path):
         """Convert FB2 to EPUB format"""
-        try:
+        if _FB2CONVERTER:
             # First try using fb2converter if available
-            import subprocess
-            result = subprocess.run(['fb2converter', fb2_path, output_path], 
-                                   capture_output=True, text=True, check=False)
-            
-            if result.returncode == 0:
-                return True
-        except:
-            pass
+            try:
+                result = subprocess.run([_FB2CONVERTER, fb2_path, output_path],
+                                       capture_output=True, text=True, check=False)
+
+                if result.returncode == 0:
+                    return True
+            except:
+                pass
         
         # Basic conversion using XML parsing
-        self.content_text.setText("Converting to EPUB format...")
-        from PyQt6.QtWidgets import QApplication
-        QApplication.processEvents()
-        
         try:
-            # Parse FB2
-            tree = ET.parse(fb2_path)
-            root = tree.getroot()
-            FB2_NS = {'fb': 'http://www.gribuser.ru/xml/fictionbook/2.0'}
-            
-            # Simple HTML-based EPUB creation
-            import zipfile
-            import tempfile
-            import os
-            
-            # Create temp directory for EPUB files
-            epub_temp = tempfile.mkdtemp()
-            
-            # Create mimetype file
-            with open(os.path.join(epub_temp, "mimetype"), "w") as f:
-                f.write("application/epub+zip")
-            
-            # Create META-INF directory
-            os.makedirs(os.path.join(epub_temp, "META-INF"))
-            
-            # Create container.xml
-            with open(os.path.join(epub_temp, "META-INF", "container.xml"), "w") as f:
-                f.write('''<?xml version="1.0" encoding="UTF-8"?>
+            title = self.book_data.get('title', 'Unknown')
+            author = self.book_data.get('author', 'Unknown')
+
+            container_xml = '''<?xml version="1.0" encoding="UTF-8"?>
                 <container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
                    <rootfiles>
                       <rootfile full-path="content.opf" media-type="application/oebps-package+xml"/>
                    </rootfiles>
-                </container>''')
-            
-            # Create content files
-            title = self.book_data.get('title', 'Unknown')
-            author = self.book_data.get('author', 'Unknown')
-            
-            # Create title page
-            with open(os.path.join(epub_temp, "title.xhtml"), "w", encoding="utf-8") as f:
-                f.write(f'''<?xml version="1.0" encoding="utf-8"?>
+                </container>'''
+
+            title_xhtml = f'''<?xml version="1.0" encoding="utf-8"?>
                 <!DOCTYPE html>
                 <html xmlns="http://www.w3.org/1999/xhtml">
                 <head>
@@ -363,23 +554,12 @@ class BookDetailsDialog(QDialog):
                     <h1>{title}</h1>
                     <h2>by {author}</h2>
                 </body>
-                </html>''')
-            
+                </html>'''
+
             # Extract book content
-            body = root.find('.//fb:body', FB2_NS)
-            content = ""
-            
-            if body is not None:
-                paragraphs = body.findall('.//fb:p', FB2_NS)
-                for p in paragraphs:
-                    if p is not None:
-                        text = "".join(p.itertext())
-                        if text:
-                            content += f"<p>{text}</p>\n"
-            
-            # Create content page
-            with open(os.path.join(epub_temp, "content.xhtml"), "w", encoding="utf-8") as f:
-                f.write(f'''<?xml version="1.0" encoding="utf-8"?>
+            content = self.get_paragraphs_html()
+
+            content_xhtml = f'''<?xml version="1.0" encoding="utf-8"?>
                 <!DOCTYPE html>
                 <html xmlns="http://www.w3.org/1999/xhtml">
                 <head>
@@ -388,11 +568,9 @@ class BookDetailsDialog(QDialog):
                 <body>
                     {content}
                 </body>
-                </html>''')
-            
-            # Create content.opf
-            with open(os.path.join(epub_temp, "content.opf"), "w", encoding="utf-8") as f:
-                f.write(f'''<?xml version="1.0" encoding="utf-8"?>
+                </html>'''
+
+            content_opf = f'''<?xml version="1.0" encoding="utf-8"?>
                 <package xmlns="http://www.idpf.org/2007/opf" unique-identifier="BookID" version="2.0">
                     <metadata xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:opf="http://www.idpf.org/2007/opf">
                         <dc:title>{title}</dc:title>
@@ -409,11 +587,9 @@ class BookDetailsDialog(QDialog):
                         <itemref idref="title"/>
                         <itemref idref="content"/>
                     </spine>
-                </package>''')
-            
-            # Create toc.ncx
-            with open(os.path.join(epub_temp, "toc.ncx"), "w", encoding="utf-8") as f:
-                f.write(f'''<?xml version="1.0" encoding="utf-8"?>
+                </package>'''
+
+            toc_ncx = f'''<?xml version="1.0" encoding="utf-8"?>
                 <ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">
                     <head>
                         <meta name="dtb:uid" content="urn:uuid:{os.urandom(16).hex()}"/>
@@ -438,57 +614,89 @@ class BookDetailsDialog(QDialog):
                             <content src="content.xhtml"/>
                         </navPoint>
                     </navMap>
-                </ncx>''')
-            
-            # Create EPUB file (ZIP with specific format)
-            with zipfile.ZipFile(output_path, 'w') as epub:
+                </ncx>'''
+
+            # Create EPUB file (ZIP with specific format) straight from the
+            # in-memory strings; there is no reason to stage them on disk.
+            # Deflate level 1 compresses this XHTML ~3-4x faster than the
+            # default level 6 for only a few percent extra size
+            with zipfile.ZipFile(output_path, 'w', compression=zipfile.ZIP_DEFLATED,
+                                 compresslevel=1) as epub:
                 # Add mimetype first without compression
-                epub.write(os.path.join(epub_temp, "mimetype"), "mimetype", 
-                         compress_type=zipfile.ZIP_STORED)
-                
+                epub.writestr(zipfile.ZipInfo("mimetype"), "application/epub+zip",
+                              compress_type=zipfile.ZIP_STORED)
+
                 # Add other files with compression
-                for root, dirs, files in os.walk(epub_temp):
-                    for file in files:
-                        if file != "mimetype":
-                            file_path = os.path.join(root, file)
-                            arcname = os.path.relpath(file_path, epub_temp)
-                            epub.write(file_path, arcname, compress_type=zipfile.ZIP_DEFLATED)
-            
-            # Clean up temp directory
-            import shutil
-            shutil.rmtree(epub_temp)
-            
+                epub.writestr("META-INF/container.xml", container_xml)
+                epub.writestr("title.xhtml", title_xhtml)
+                epub.writestr("content.xhtml", content_xhtml)
+                epub.writestr("content.opf", content_opf)
+                epub.writestr("toc.ncx", toc_ncx)
+
             return True
-        
+
         except Exception as e:
             raise Exception(f"EPUB conversion failed: {str(e)}")
 
+    def render_pdf_with_webengine(self, html_path, output_path):
+        """Render staged HTML to PDF with QtWebEngine on the GUI thread.
+
+        printToPdf is asynchronous, so spin a nested QEventLoop until
+        pdfPrintingFinished fires instead of poking processEvents and
+        hoping the load has completed.
+        """
+        from PyQt6.QtCore import QEventLoop, QUrl
+        from PyQt6.QtWebEngineCore import QWebEngineSettings
+        from PyQt6.QtWebEngineWidgets import QWebEngineView
+
+        try:
+            loop = QEventLoop()
+            result = {'ok': False}
+
+            web = QWebEngineView()
+            web.settings().setAttribute(QWebEngineSettings.WebAttribute.JavascriptEnabled, False)
+
+            def on_pdf_finished(path, ok):
+                result['ok'] = ok
+                loop.quit()
+
+            def on_load_finished(success):
+                if success:
+                    web.page().printToPdf(output_path)
+                else:
+                    loop.quit()
+
+            web.page().pdfPrintingFinished.connect(on_pdf_finished)
+            web.loadFinished.connect(on_load_finished)
+            web.load(QUrl.fromLocalFile(html_path))
+            loop.exec()
+
+            self._pdf_render_ok = result['ok']
+        except Exception as e:
+            print(f"PyQt PDF generation failed: {e}")
+            self._pdf_render_ok = False
+        finally:
+            self._pdf_render_done.set()
+
     def convert_to_pdf(self, fb2_path, output_path):
         """Convert FB2 to PDF format"""
-        try:
+        if _FB2PDF:
             # First try using external converter if available
-            import subprocess
-            result = subprocess.run(['fb2pdf', fb2_path, output_path], 
-                                   capture_output=True, text=True, check=False)
-            
-            if result.returncode == 0:
-                return True
-        except:
-            pass
+            try:
+                result = subprocess.run([_FB2PDF, fb2_path, output_path],
+                                       capture_output=True, text=True, check=False)
+
+                if result.returncode == 0:
+                    return True
+            except:
+                pass
         
         # Fallback method
-        self.content_text.setText("Converting to PDF format...")
-        from PyQt6.QtWidgets import QApplication
-        QApplication.processEvents()
-        
         try:
             import tempfile
             import os
             
-            # Parse FB2
-            tree = ET.parse(fb2_path)
-            root = tree.getroot()
-            FB2_NS = {'fb': 'http://www.gribuser.ru/xml/fictionbook/2.0'}
+            root = self.get_fb2_root()
             
             # Extract book data
             title = self.book_data.get('title', 'Unknown')
@@ -513,16 +721,8 @@ class BookDetailsDialog(QDialog):
             """
             
             # Extract content
-            body = root.find('.//fb:body', FB2_NS)
-            if body is not None:
-                paragraphs = body.findall('.//fb:p', FB2_NS)
-                for p in paragraphs:
-                    if p is not None:
-                        text = "".join(p.itertext())
-                        if text:
-                            html_content += f"<p>{text}</p>\n"
-            
-            html_content += "</body></html>"
+            body = _find_body(root)
+            html_content = "\n".join([html_content, self.get_paragraphs_html(), "</body></html>"])
             
             # Create temporary HTML file
             with tempfile.NamedTemporaryFile('w', suffix='.html', delete=False, encoding='utf-8') as f:
@@ -531,51 +731,37 @@ class BookDetailsDialog(QDialog):
             
             # Try various conversion methods
             conversion_success = False
-            
-            # 1. Try using PyQt's printing capabilities
+
+            # 1. Render via QtWebEngine: the widget has to live on the GUI
+            # thread, so hand the staged HTML over through a signal and
+            # wait for the nested event loop over there to report back
             try:
-                from PyQt6.QtCore import QUrl
-                from PyQt6.QtGui import QPageLayout, QPageSize
-                from PyQt6.QtPrintSupport import QPrinter
-                from PyQt6.QtWebEngineCore import QWebEngineSettings
-                from PyQt6.QtWebEngineWidgets import QWebEngineView
-                
-                printer = QPrinter(QPrinter.PrinterMode.HighResolution)
-                printer.setOutputFormat(QPrinter.OutputFormat.PdfFormat)
-                printer.setOutputFileName(output_path)
-                
-                page_layout = QPageLayout()
-                page_layout.setPageSize(QPageSize(QPageSize.PageSizeId.A4))
-                printer.setPageLayout(page_layout)
-                
-                web = QWebEngineView()
-                web.settings().setAttribute(QWebEngineSettings.WebAttribute.JavascriptEnabled, False)
-                web.load(QUrl.fromLocalFile(html_path))
-                
-                def handle_load_finished(success):
-                    if success:
-                        web.page().print(printer, lambda success: print(f"PDF generation: {'success' if success else 'failed'}"))
-                        conversion_success = True
-                    else:
-                        print("Failed to load HTML")
-                
-                web.loadFinished.connect(handle_load_finished)
-                # Wait for page to load
-                QApplication.processEvents()
-                
-                if conversion_success:
-                    return True
-            except Exception as e:
-                print(f"PyQt PDF generation failed: {e}")
-            
+                from PyQt6.QtWebEngineWidgets import QWebEngineView  # noqa: F401
+
+                # Skip the render once the dialog is closing: the queued
+                # slot could never run while the GUI thread shuts down
+                if not self._closing:
+                    self._pdf_render_done.clear()
+                    self._pdf_render_ok = False
+                    self.pdf_render_signal.emit(html_path, output_path)
+                    if self._pdf_render_done.wait(timeout=120):
+                        conversion_success = self._pdf_render_ok
+            except ImportError:
+                pass
+
+            if conversion_success:
+                os.unlink(html_path)
+                return True
+
             # 2. Try wkhtmltopdf if available
-            try:
-                result = subprocess.run(['wkhtmltopdf', html_path, output_path], 
-                                      check=True, capture_output=True)
-                if result.returncode == 0:
-                    conversion_success = True
-            except Exception as e:
-                print(f"wkhtmltopdf failed: {e}")
+            if _WKHTMLTOPDF:
+                try:
+                    result = subprocess.run([_WKHTMLTOPDF, html_path, output_path],
+                                          check=True, capture_output=True)
+                    if result.returncode == 0:
+                        conversion_success = True
+                except Exception as e:
+                    print(f"wkhtmltopdf failed: {e}")
             
             # 3. Try reportlab as a last resort
             if not conversion_success:
@@ -597,12 +783,10 @@ class BookDetailsDialog(QDialog):
                     
                     # Add content paragraphs
                     if body is not None:
-                        paragraphs = body.findall('.//fb:p', FB2_NS)
-                        for p in paragraphs:
-                            if p is not None:
-                                text = "".join(p.itertext())
-                                if text:
-                                    story.append(Paragraph(text, styles['Normal']))
+                        for p in _body_paragraphs(body):
+                            text = "".join(p.itertext())
+                            if text:
+                                story.append(Paragraph(text, styles['Normal']))
                     
                     doc.build(story)
                     conversion_success = True
@@ -1,16 +1,20 @@
 #!/usr/bin/env python3
 
 import argparse
+import csv
 import os
-import tempfile
-from pathlib import Path
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 import sqlite3
 
 from fb2_db_utils import (
     initialize_database, 
-    process_archive, 
     get_processed_archives,
-    calculate_sha1
+    get_known_sha1s,
+    scan_archive,
+    bulk_load,
+    INSERT_FB2_SQL
 )
 
 def create_db(db_path, csv_path):
@@ -19,14 +23,17 @@ def create_db(db_path, csv_path):
         print(f"Error: CSV file {csv_path} not found")
         return False
     
-    conn = initialize_database(db_path)
+    conn = initialize_database(db_path, bulk=True)
     cursor = conn.cursor()
     
     # Import CSV data
     print(f"Importing data from {csv_path}...")
     records_added = 0
     
-    with open(csv_path, 'r', encoding='utf-8') as csv_file:
+    # Oversized annotation-style fields shouldn't kill the import
+    csv.field_size_limit(sys.maxsize)
+    
+    with open(csv_path, 'r', encoding='utf-8', newline='', buffering=1 << 20) as csv_file:
         csv_reader = csv.reader(csv_file)
         # Skip header row if it exists
         try:
@@ -38,35 +45,63 @@ def create_db(db_path, csv_path):
             conn.close()
             return False
         
-        for row in csv_reader:
-            try:
-                if len(row) < 8:
-                    print(f"Skipping invalid row (not enough columns): {row}")
+        # Stream validated tuples into executemany a batch at a time.
+        # A batch that trips a constraint is rolled back to a savepoint
+        # and replayed row by row, so one bad row costs one row, not the
+        # rest of the file. FTS maintenance is suspended for the
+        # duration and rebuilt once.
+        def row_gen():
+            for row in csv_reader:
+                try:
+                    if len(row) < 8:
+                        print(f"Skipping invalid row (not enough columns): {row}")
+                        continue
+                    
+                    outer_zip, inner_zip, sha1, author, size, title, year, publisher = row[:8]
+                    
+                    # Try to convert size to integer
+                    try:
+                        size = int(size)
+                    except (ValueError, TypeError):
+                        size = 0
+                except Exception as e:
+                    print(f"Error importing row {row}: {e}")
                     continue
+                yield (outer_zip, inner_zip, sha1, author, size, title, year, publisher)
+        
+        with bulk_load(conn):
+            cursor.execute("BEGIN")
+            # Don't spill dirty cache pages to disk mid-transaction
+            cursor.execute("PRAGMA cache_spill=OFF")
+            
+            rows = row_gen()
+            last_report = 0
+            while True:
+                batch = list(islice(rows, 5000))
+                if not batch:
+                    break
                 
-                outer_zip, inner_zip, sha1, author, size, title, year, publisher = row
-                
-                # Try to convert size to integer
                 try:
-                    size = int(size)
-                except (ValueError, TypeError):
-                    size = 0
-                
-                cursor.execute('''
-                INSERT INTO fb2_files 
-                (outer_zip, inner_zip, sha1, author, size, title, year, publisher)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (outer_zip, inner_zip, sha1, author, size, title, year, publisher))
-                records_added += 1
+                    cursor.execute("SAVEPOINT batch")
+                    cursor.executemany(INSERT_FB2_SQL, batch)
+                    cursor.execute("RELEASE batch")
+                    records_added += len(batch)
+                except sqlite3.Error:
+                    # Undo the partial batch and retry one row at a time
+                    cursor.execute("ROLLBACK TO batch")
+                    cursor.execute("RELEASE batch")
+                    for row in batch:
+                        try:
+                            cursor.execute(INSERT_FB2_SQL, row)
+                            records_added += 1
+                        except sqlite3.Error as e:
+                            print(f"Error importing row {row}: {e}")
                 
-                if records_added % 10000 == 0:
+                if records_added - last_report >= 100000:
                     print(f"Processed {records_added} records...")
-                    conn.commit()
-                    
-            except Exception as e:
-                print(f"Error importing row {row}: {e}")
-    
-    conn.commit()
+                    last_report = records_added
+            
+            conn.commit()
     print(f"Import completed. Added {records_added} records to the database.")
     
     # Show some stats
@@ -83,15 +118,19 @@ def process_archives(db_path, archives_dir, force_reprocess=False):
         print(f"Error: Directory {archives_dir} not found")
         return False
     
-    conn = initialize_database(db_path)
+    conn = initialize_database(db_path, bulk=True)
     
     # Get already processed archives if not forcing reprocessing
     processed_archives = set()
     if not force_reprocess:
         processed_archives = get_processed_archives(conn)
     
-    # Find ZIP files in the directory
-    archives = [f for f in Path(archives_dir).glob('*.zip')]
+    # Find ZIP files in the directory; scandir hands back name and type
+    # without a stat or Path allocation per entry
+    with os.scandir(archives_dir) as it:
+        archives = [entry.path for entry in it
+                    if entry.is_file(follow_symlinks=False)
+                    and entry.name.lower().endswith('.zip')]
     print(f"Found {len(archives)} archives in directory")
     
     # Process only new archives unless force_reprocess is True
@@ -99,14 +138,41 @@ def process_archives(db_path, archives_dir, force_reprocess=False):
         new_archives = archives
         print(f"Processing all {len(new_archives)} archives (force mode)")
     else:
-        new_archives = [a for a in archives if a.name not in processed_archives]
+        new_archives = [a for a in archives
+                        if os.path.basename(a) not in processed_archives]
         print(f"Processing {len(new_archives)} new archives")
     
+    # Scan whole archives in parallel worker processes - the zlib +
+    # hash + parse pipeline scales with cores once it is out from under
+    # a single interpreter - and keep all SQLite work on this process.
+    # With nothing new to scan, don't enter bulk_load at all.
     total_inserted = 0
-    with tempfile.TemporaryDirectory() as temp_dir:
-        for archive in new_archives:
-            inserted = process_archive(conn, archive, temp_dir)
-            total_inserted += inserted
+    
+    if new_archives:
+        known_sha1s = get_known_sha1s(conn)
+        cursor = conn.cursor()
+        
+        with bulk_load(conn), ProcessPoolExecutor() as pool:
+            for rows in pool.map(scan_archive, new_archives):
+                if not rows:
+                    continue
+                
+                inserted = 0
+                cursor.execute("BEGIN IMMEDIATE")
+                for row in rows:
+                    sha1 = row[2]
+                    if sha1 in known_sha1s:
+                        continue
+                    try:
+                        cursor.execute(INSERT_FB2_SQL, row)
+                        known_sha1s.add(sha1)
+                        inserted += 1
+                    except sqlite3.IntegrityError as e:
+                        print(f"  Skipping (database constraint): {row[1]} - {e}")
+                cursor.execute("COMMIT")
+                
+                print(f"  Added {inserted} files from {rows[0][0]}")
+                total_inserted += inserted
     
     print(f"Added {total_inserted} new FB2 files to the database")
     conn.close()
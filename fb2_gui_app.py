@@ -2,10 +2,13 @@
 
 import sys
 import os
-from PyQt6.QtWidgets import QApplication, QMainWindow, QMessageBox, QFileDialog
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+import sqlite3
+import time
+from collections import OrderedDict
+from PyQt6.QtWidgets import QApplication, QMainWindow, QMessageBox, QFileDialog, QHeaderView, QStyledItemDelegate
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QThread, QTimer, pyqtSignal
 from fb2_gui_ui import Ui_MainWindow
-from fb2_db_utils import initialize_database, process_archive, get_processed_archives
+from fb2_db_utils import initialize_database, process_archive, get_processed_archives, get_known_sha1s
 
 class WorkerThread(QThread):
     """Worker thread for processing archives without blocking UI"""
@@ -21,43 +24,61 @@ class WorkerThread(QThread):
         self.running = True
     
     def run(self):
-        import tempfile
-        from pathlib import Path
-        import sqlite3
-        
         try:
-            conn = initialize_database(self.db_path)
+            conn = initialize_database(self.db_path, bulk=True)
             
             # Get already processed archives if not forcing reprocess
             processed_archives = set()
             if not self.force_reprocess:
                 processed_archives = get_processed_archives(conn)
             
-            # Find ZIP files in the directory
-            archives = [f for f in Path(self.archives_dir).glob('*.zip')]
+            # Find ZIP files in the directory; scandir hands back name
+            # and type without a stat or Path allocation per entry
+            with os.scandir(self.archives_dir) as it:
+                archives = [entry.path for entry in it
+                            if entry.is_file(follow_symlinks=False)
+                            and entry.name.lower().endswith('.zip')]
             self.update_signal.emit(f"Found {len(archives)} archives in directory")
             
             # Process only new archives if not forcing reprocess
             if not self.force_reprocess:
-                archives = [a for a in archives if a.name not in processed_archives]
+                archives = [a for a in archives
+                            if os.path.basename(a) not in processed_archives]
                 self.update_signal.emit(f"Processing {len(archives)} new archives")
             
             total_archives = len(archives)
             total_inserted = 0
+            known_sha1s = get_known_sha1s(conn)
+            
+            # Batch log messages: every emit crosses the thread boundary
+            # and wakes the GUI event loop, so flush them in groups
+            # rather than once per archive
+            pending_log = []
+            last_progress_emit = 0.0
             
-            with tempfile.TemporaryDirectory() as temp_dir:
-                for i, archive in enumerate(archives):
-                    if not self.running:
-                        break
-                    
-                    self.update_signal.emit(f"Processing archive: {archive.name}")
-                    inserted = process_archive(conn, archive, temp_dir)
-                    total_inserted += inserted
-                    
-                    # Update progress
+            for i, archive in enumerate(archives):
+                if not self.running:
+                    break
+                
+                inserted = process_archive(conn, archive, known_sha1s)
+                total_inserted += inserted
+                
+                pending_log.append(f"Processed archive: {os.path.basename(archive)} ({inserted} new)")
+                if len(pending_log) >= 10:
+                    self.update_signal.emit("\n".join(pending_log))
+                    pending_log = []
+                
+                # Update progress at ~30 Hz at most; the bar can't paint
+                # faster than that anyway
+                now = time.monotonic()
+                if now - last_progress_emit >= 0.033 or i + 1 == total_archives:
+                    last_progress_emit = now
                     progress = int((i+1) / total_archives * 100)
                     self.progress_signal.emit(progress)
             
+            if pending_log:
+                self.update_signal.emit("\n".join(pending_log))
+            
             self.update_signal.emit(f"Added {total_inserted} new FB2 files to the database")
             self.finished_signal.emit(total_inserted)
             conn.close()
@@ -69,12 +90,195 @@ class WorkerThread(QThread):
     def stop(self):
         self.running = False
 
+class SizeDelegate(QStyledItemDelegate):
+    """Renders the Size column's raw byte counts as human-readable text.
+
+    The model keeps plain ints, so sorting compares numbers; only the
+    visible cells pay for formatting.
+    """
+    
+    def displayText(self, value, locale):
+        try:
+            return locale.formattedDataSize(int(value))
+        except (TypeError, ValueError):
+            return str(value)
+
+class BooksTableModel(QAbstractTableModel):
+    """Read-only model over the search result rows.
+
+    Rows are kept as plain tuples straight from the cursor; the view
+    only asks for the cells that are actually visible.
+    """
+    
+    HEADERS = ["ID", "Title", "Author", "Year", "Publisher", "Archive", "Path", "Size"]
+    
+    # Rows pulled from the cursor per fetchMore call
+    BATCH_SIZE = 200
+    
+    # Fully loaded result sets kept for repeated queries
+    CACHE_SIZE = 32
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._cursor = None
+        self._exhausted = True
+        self._cache = OrderedDict()
+        self._cache_key = None
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (role == Qt.ItemDataRole.DisplayRole
+                and orientation == Qt.Orientation.Horizontal):
+            return self.HEADERS[section]
+        return None
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        return self._rows[index.row()][index.column()]
+    
+    def cached(self, cache_key):
+        """Serve a previously completed result set, if we still have it."""
+        if cache_key not in self._cache:
+            return False
+        self._cache.move_to_end(cache_key)
+        self.beginResetModel()
+        self._rows = list(self._cache[cache_key])
+        self._cursor = None
+        self._exhausted = True
+        self._cache_key = None
+        self.endResetModel()
+        return True
+    
+    def clear_cache(self):
+        """Forget cached results and drop any in-flight stream
+        (the database changed)."""
+        self._cache.clear()
+        self._cache_key = None
+        self._cursor = None
+        self._exhausted = True
+    
+    def set_cursor(self, cursor, cache_key=None):
+        """Stream a new result set from a database cursor.
+
+        Only the first page is materialized here; the view asks for
+        more via canFetchMore/fetchMore as the user scrolls down. Once
+        a result set finishes loading it is remembered under cache_key.
+        """
+        self.beginResetModel()
+        self._rows = []
+        self._cursor = cursor
+        self._exhausted = cursor is None
+        self._cache_key = cache_key
+        self.endResetModel()
+        if cursor is not None:
+            self.fetchMore(QModelIndex())
+    
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self._exhausted
+    
+    def fetchMore(self, parent):
+        if parent.isValid() or self._exhausted:
+            return
+        
+        try:
+            batch = self._cursor.fetchmany(self.BATCH_SIZE)
+        except sqlite3.Error:
+            # The connection was swapped out underneath us; end the
+            # stream without caching the partial rows as a result set
+            self._exhausted = True
+            self._cache_key = None
+            return
+        
+        if batch:
+            batch = [self._display_row(row) for row in batch]
+            start = len(self._rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(batch) - 1)
+            self._rows.extend(batch)
+            self.endInsertRows()
+        
+        if len(batch) < self.BATCH_SIZE:
+            self._exhausted = True
+            if self._cache_key is not None:
+                self._cache[self._cache_key] = tuple(self._rows)
+                while len(self._cache) > self.CACHE_SIZE:
+                    self._cache.popitem(last=False)
+                self._cache_key = None
+    
+    def all_loaded(self):
+        return self._exhausted
+    
+    @staticmethod
+    def _display_row(row):
+        # Convert once at load; data() is called per paint and should
+        # only index into ready-made values. Size stays a raw int - the
+        # view's delegate formats it and sorts compare numerically.
+        return (str(row[0]), row[1], row[2], row[3], row[4],
+                row[5], row[6], row[7])
+    
+    def row(self, row):
+        return self._rows[row]
+    
+    def update_row(self, row, values):
+        """Replace one row in place, invalidating only its display.
+
+        A scoped dataChanged with an explicit role list lets the view
+        repaint just these cells; never use layoutChanged for this - it
+        would re-measure the whole table.
+        """
+        self._rows[row] = self._display_row(values)
+        self.dataChanged.emit(
+            self.index(row, 0),
+            self.index(row, self.columnCount() - 1),
+            [Qt.ItemDataRole.DisplayRole])
+
 class FB2DatabaseManagerApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
         
+        # Results model/view. The proxy narrows the already-loaded rows
+        # in C++ while the user types; a fresh FTS query replaces the
+        # source model's contents. Dynamic filtering is off so paged-in
+        # rows don't re-trigger the filter during bulk inserts.
+        self.results_model = BooksTableModel(self)
+        self._results_proxy = QSortFilterProxyModel(self)
+        self._results_proxy.setSourceModel(self.results_model)
+        self._results_proxy.setFilterKeyColumn(-1)
+        self._results_proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self._results_proxy.setDynamicSortFilter(False)
+        self.ui.tableResults.setModel(self._results_proxy)
+        self.ui.tableResults.setItemDelegateForColumn(7, SizeDelegate(self.ui.tableResults))
+        
+        # Title is the only stretch column; the rest are Interactive
+        # with widths computed once from prototypical content. With a
+        # single stretch section a window resize adjusts one column in
+        # O(1) instead of arbitrating between several.
+        header = self.ui.tableResults.horizontalHeader()
+        header.setStretchLastSection(False)
+        
+        fm = self.fontMetrics()
+        default_widths = {
+            0: fm.horizontalAdvance("00000000") + 12,                    # ID
+            2: fm.horizontalAdvance("Some Author Name Here") + 12,       # Author
+            3: fm.horizontalAdvance("0000") + 12,                        # Year
+            4: fm.horizontalAdvance("Some Publisher Name") + 12,         # Publisher
+            5: fm.horizontalAdvance("fb2-000000-000000.zip") + 12,       # Archive
+            6: fm.horizontalAdvance("000000/long-book-name.fb2") + 12,   # Path
+            7: fm.horizontalAdvance("999.9 MB") + 12,                    # Size
+        }
+        for col, width in default_widths.items():
+            header.setSectionResizeMode(col, QHeaderView.ResizeMode.Interactive)
+            header.resizeSection(col, width)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)  # Title
+        
         # Connect signals
         self.ui.actionOpen_Database.triggered.connect(self.open_database)
         self.ui.actionCreate_New_Database.triggered.connect(self.create_database)
@@ -83,10 +287,28 @@ class FB2DatabaseManagerApp(QMainWindow):
         self.ui.buttonProcess.clicked.connect(self.process_archives)
         self.ui.buttonSearch.clicked.connect(self.search_database)
         # Connect double-click on table to show book details
-        self.ui.tableResults.cellDoubleClicked.connect(self.show_book_details)
+        self.ui.tableResults.doubleClicked.connect(self.show_book_details)
+        
+        # Processing log: buffer incoming lines and flush them on a
+        # timer tick; appending per line re-lays-out the document each
+        # time. The block cap discards old lines in O(1).
+        self.ui.textLog.document().setMaximumBlockCount(5000)
+        self._log_buffer = []
+        self._log_flush_timer = QTimer(self)
+        self._log_flush_timer.setInterval(100)
+        self._log_flush_timer.timeout.connect(self.flush_log)
+        
+        # Live search: coalesce keystrokes into one query instead of
+        # hitting SQLite per character
+        self._search_debounce = QTimer(self)
+        self._search_debounce.setSingleShot(True)
+        self._search_debounce.setInterval(250)
+        self._search_debounce.timeout.connect(self.live_search)
+        self.ui.lineEditSearch.textChanged.connect(self._search_debounce.start)
         
         # Initialize variables
         self.db_path = None
+        self.conn = None
         self.archives_dir = None
         self.worker_thread = None
         
@@ -101,10 +323,20 @@ class FB2DatabaseManagerApp(QMainWindow):
         
         if file_path:
             self.db_path = file_path
+            self.set_connection(sqlite3.connect(self.db_path))
             self.statusBar().showMessage(f"Database: {os.path.basename(self.db_path)}")
             self.ui.labelDatabase.setText(f"Database: {os.path.basename(self.db_path)}")
             self.update_book_count()
     
+    def set_connection(self, conn):
+        """Swap in the long-lived read connection for the GUI."""
+        if self.conn is not None:
+            self.conn.close()
+        self.conn = conn
+        self.results_model.clear_cache()
+        # Keep the read path on mmap so repeated searches stay warm
+        self.conn.execute("PRAGMA mmap_size=268435456")
+    
     def create_database(self):
         file_dialog = QFileDialog()
         file_path, _ = file_dialog.getSaveFileName(
@@ -114,7 +346,7 @@ class FB2DatabaseManagerApp(QMainWindow):
         if file_path:
             self.db_path = file_path
             try:
-                initialize_database(self.db_path)
+                self.set_connection(initialize_database(self.db_path))
                 self.statusBar().showMessage(f"Created new database: {os.path.basename(self.db_path)}")
                 self.ui.labelDatabase.setText(f"Database: {os.path.basename(self.db_path)}")
             except Exception as e:
@@ -143,6 +375,8 @@ class FB2DatabaseManagerApp(QMainWindow):
         self.ui.buttonProcess.setEnabled(False)
         self.ui.progressBar.setValue(0)
         self.ui.textLog.clear()
+        self._log_buffer.clear()
+        self._log_flush_timer.start()
         
         # Start worker thread
         self.worker_thread = WorkerThread(self.db_path, self.archives_dir, force_reprocess)
@@ -152,33 +386,46 @@ class FB2DatabaseManagerApp(QMainWindow):
         self.worker_thread.start()
     
     def update_log(self, message):
-        self.ui.textLog.append(message)
+        self._log_buffer.append(message)
+    
+    def flush_log(self):
+        if self._log_buffer:
+            self.ui.textLog.append("\n".join(self._log_buffer))
+            self._log_buffer.clear()
     
     def processing_finished(self, total_inserted):
+        self._log_flush_timer.stop()
+        self.flush_log()
         self.ui.buttonProcess.setEnabled(True)
         if total_inserted >= 0:
             self.statusBar().showMessage(f"Processing completed. Added {total_inserted} books.")
+            self.results_model.clear_cache()
             self.update_book_count()
         else:
             self.statusBar().showMessage("Processing failed.")
     
     def update_book_count(self):
-        if not self.db_path:
+        if not self.conn:
             return
         
         try:
-            import sqlite3
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self.conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM fb2_files")
             count = cursor.fetchone()[0]
             self.ui.labelBookCount.setText(f"Total books: {count}")
-            conn.close()
         except Exception as e:
             self.ui.labelBookCount.setText("Total books: Unknown")
     
+    def live_search(self):
+        # Triggered by typing: refine whatever is already loaded via the
+        # proxy - no database round trip. The Search button still runs
+        # the full FTS query.
+        if not self.conn:
+            return
+        self._results_proxy.setFilterFixedString(self.ui.lineEditSearch.text().strip())
+    
     def search_database(self):
-        if not self.db_path:
+        if not self.conn:
             QMessageBox.warning(self, "Warning", "Please open a database first.")
             return
         
@@ -187,51 +434,67 @@ class FB2DatabaseManagerApp(QMainWindow):
             return
         
         try:
-            import sqlite3
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self.conn.cursor()
+            
+            # Plain single-term queries get a trailing * so they match as
+            # prefixes rather than requiring a whole-token hit; anything
+            # with spaces, quotes or an explicit * is passed through as
+            # FTS5 query syntax
+            query = search_text
+            if not any(c in query for c in ' "*'):
+                query = f'{query}*'
             
-            # Clear the table
-            self.ui.tableResults.setRowCount(0)
+            # Re-serve fully loaded result sets without touching SQLite
+            cache_key = " ".join(query.lower().split())
+            if self.results_model.cached(cache_key):
+                self._results_proxy.setFilterFixedString("")
+                self.statusBar().showMessage(
+                    f"Found {self.results_model.rowCount()} results (cached)")
+                return
             
-            # Search in FTS table
+            # Search in FTS table: drive the query from the FTS index and
+            # join back to the content table by rowid, best matches first
             cursor.execute("""
-                SELECT fb2_files.id, fb2_files.title, fb2_files.author, fb2_files.year, 
-                       fb2_files.publisher, fb2_files.outer_zip, fb2_files.inner_zip, fb2_files.size
-                FROM fb2_search 
-                JOIN fb2_files ON fb2_search.rowid = fb2_files.id
+                SELECT f.id, f.title, f.author, f.year, 
+                       f.publisher, f.outer_zip, f.inner_zip, f.size
+                FROM fb2_search s
+                JOIN fb2_files f ON f.id = s.rowid
                 WHERE fb2_search MATCH ?
-                LIMIT 1000
-            """, (search_text,))
+                ORDER BY rank
+            """, (query,))
             
-            # Add results to table
-            for row_data in cursor.fetchall():
-                row_position = self.ui.tableResults.rowCount()
-                self.ui.tableResults.insertRow(row_position)
-                
-                for column, value in enumerate(row_data):
-                    from PyQt6.QtWidgets import QTableWidgetItem
-                    self.ui.tableResults.setItem(row_position, column, QTableWidgetItem(str(value)))
+            # A fresh query replaces the result set, so drop any local
+            # refinement filter
+            self._results_proxy.setFilterFixedString("")
             
-            conn.close()
-            self.statusBar().showMessage(f"Found {self.ui.tableResults.rowCount()} results")
+            # Hand the live cursor to the model; further pages load as
+            # the user scrolls
+            self.results_model.set_cursor(cursor, cache_key)
+            
+            shown = self.results_model.rowCount()
+            if self.results_model.all_loaded():
+                self.statusBar().showMessage(f"Found {shown} results")
+            else:
+                self.statusBar().showMessage(f"Showing first {shown} results")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Search failed: {str(e)}")
     
-    def show_book_details(self, row, column):
-        if not self.db_path:
+    def show_book_details(self, index):
+        if not self.db_path or not index.isValid():
             return
         
-        # Get book data from the selected row
+        # Get book data from the selected row (map through the proxy)
+        source_index = self._results_proxy.mapToSource(index)
+        row = self.results_model.row(source_index.row())
         book_data = {}
-        book_data['id'] = self.ui.tableResults.item(row, 0).text()
-        book_data['title'] = self.ui.tableResults.item(row, 1).text()
-        book_data['author'] = self.ui.tableResults.item(row, 2).text()
-        book_data['year'] = self.ui.tableResults.item(row, 3).text()
-        book_data['publisher'] = self.ui.tableResults.item(row, 4).text()
-        book_data['outer_zip'] = self.ui.tableResults.item(row, 5).text()
-        book_data['inner_zip'] = self.ui.tableResults.item(row, 6).text()
-        book_data['size'] = self.ui.tableResults.item(row, 7).text()
+        book_data['id'] = str(row[0])
+        book_data['title'] = str(row[1])
+        book_data['author'] = str(row[2])
+        book_data['year'] = str(row[3])
+        book_data['publisher'] = str(row[4])
+        book_data['outer_zip'] = str(row[5])
+        book_data['inner_zip'] = str(row[6])
+        book_data['size'] = str(row[7])
         book_data['db_path'] = self.db_path
         
         # Pass the archives directory to the dialog
@@ -252,9 +515,15 @@ class FB2DatabaseManagerApp(QMainWindow):
             if reply == QMessageBox.StandardButton.Yes:
                 self.worker_thread.stop()
                 self.worker_thread.wait()
-                event.accept()
             else:
                 event.ignore()
+                return
+        
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        
+        event.accept()
 
 def main():
     app = QApplication(sys.argv)
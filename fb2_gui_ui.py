@@ -1,50 +1,73 @@
-from PyQt6.QtCore import QMetaObject, QRect, QSize, Qt
+from PyQt6.QtCore import QRect, QSize, Qt, QTimer
+from PyQt6.QtGui import QAction, QKeySequence
 from PyQt6.QtWidgets import (
     QApplication, QCheckBox, QFormLayout, QFrame, QGridLayout, QGroupBox, 
     QHBoxLayout, QHeaderView, QLabel, QLineEdit, QMainWindow, QMenu, QMenuBar, 
     QProgressBar, QPushButton, QSizePolicy, QSpacerItem, QSplitter, 
-    QStatusBar, QTabWidget, QTableWidget, QTableWidgetItem, QTextEdit, 
+    QStatusBar, QTabWidget, QTableView, QTextEdit, 
     QToolBar, QVBoxLayout, QWidget
 )
 
+class SampledTableView(QTableView):
+    """QTableView whose column size hints sample only visible rows.
+
+    The stock implementation measures every row in the model, so a
+    header double-click auto-fit on a large result set turns into an
+    O(rows) string-measuring pass.
+    """
+    
+    def sizeHintForColumn(self, column):
+        model = self.model()
+        if model is None:
+            return -1
+        
+        first = self.rowAt(0)
+        if first < 0:
+            first = 0
+        last = self.rowAt(self.viewport().height())
+        if last < 0:
+            last = min(model.rowCount() - 1, first + 50)
+        
+        width = 0
+        for row in range(first, last + 1):
+            hint = self.sizeHintForIndex(model.index(row, column))
+            if hint.width() > width:
+                width = hint.width()
+        return width if width > 0 else 100
+
 class Ui_MainWindow(object):
     def setupUi(self, MainWindow):
         if not MainWindow.objectName():
             MainWindow.setObjectName("MainWindow")
         MainWindow.resize(1000, 800)
         
+        # Build the whole tree with repaints off; each widget parented
+        # into a live window otherwise triggers its own layout pass
+        MainWindow.setUpdatesEnabled(False)
+        
         self.centralwidget = QWidget(parent=MainWindow)
-        self.centralwidget.setObjectName("centralwidget")
         
         self.verticalLayout = QVBoxLayout(self.centralwidget)
-        self.verticalLayout.setObjectName("verticalLayout")
         
         # Main splitter between controls and results
         self.splitter = QSplitter(parent=self.centralwidget)
         self.splitter.setOrientation(Qt.Orientation.Vertical)
-        self.splitter.setObjectName("splitter")
         
         # Top widget with controls
         self.widgetTop = QWidget(parent=self.splitter)
-        self.widgetTop.setObjectName("widgetTop")
         
         self.verticalLayoutTop = QVBoxLayout(self.widgetTop)
-        self.verticalLayoutTop.setObjectName("verticalLayoutTop")
         
         # Database info
         self.groupBoxDatabase = QGroupBox(parent=self.widgetTop)
-        self.groupBoxDatabase.setObjectName("groupBoxDatabase")
         self.groupBoxDatabase.setTitle("Database Information")
         
         self.formLayoutDatabase = QFormLayout(self.groupBoxDatabase)
-        self.formLayoutDatabase.setObjectName("formLayoutDatabase")
         
         self.labelDatabase = QLabel(parent=self.groupBoxDatabase)
-        self.labelDatabase.setObjectName("labelDatabase")
         self.labelDatabase.setText("Database: Not selected")
         
         self.labelBookCount = QLabel(parent=self.groupBoxDatabase)
-        self.labelBookCount.setObjectName("labelBookCount")
         self.labelBookCount.setText("Total books: 0")
         
         self.formLayoutDatabase.setWidget(0, QFormLayout.ItemRole.LabelRole, self.labelDatabase)
@@ -54,34 +77,26 @@ class Ui_MainWindow(object):
         
         # Processing controls
         self.groupBoxProcessing = QGroupBox(parent=self.widgetTop)
-        self.groupBoxProcessing.setObjectName("groupBoxProcessing")
         self.groupBoxProcessing.setTitle("Process Archives")
         
         self.gridLayoutProcessing = QGridLayout(self.groupBoxProcessing)
-        self.gridLayoutProcessing.setObjectName("gridLayoutProcessing")
         
         self.labelArchivesDir = QLabel(parent=self.groupBoxProcessing)
-        self.labelArchivesDir.setObjectName("labelArchivesDir")
         self.labelArchivesDir.setText("Archives Directory: Not selected")
         
         self.buttonSelectArchivesDir = QPushButton(parent=self.groupBoxProcessing)
-        self.buttonSelectArchivesDir.setObjectName("buttonSelectArchivesDir")
         self.buttonSelectArchivesDir.setText("Select Directory")
         
         self.checkBoxForceReprocess = QCheckBox(parent=self.groupBoxProcessing)
-        self.checkBoxForceReprocess.setObjectName("checkBoxForceReprocess")
         self.checkBoxForceReprocess.setText("Force reprocess all archives")
         
         self.buttonProcess = QPushButton(parent=self.groupBoxProcessing)
-        self.buttonProcess.setObjectName("buttonProcess")
         self.buttonProcess.setText("Process Archives")
         
         self.progressBar = QProgressBar(parent=self.groupBoxProcessing)
-        self.progressBar.setObjectName("progressBar")
         self.progressBar.setValue(0)
         
         self.textLog = QTextEdit(parent=self.groupBoxProcessing)
-        self.textLog.setObjectName("textLog")
         self.textLog.setReadOnly(True)
         
         self.gridLayoutProcessing.addWidget(self.labelArchivesDir, 0, 0, 1, 2)
@@ -95,25 +110,19 @@ class Ui_MainWindow(object):
         
         # Bottom widget with results
         self.widgetBottom = QWidget(parent=self.splitter)
-        self.widgetBottom.setObjectName("widgetBottom")
         
         self.verticalLayoutBottom = QVBoxLayout(self.widgetBottom)
-        self.verticalLayoutBottom.setObjectName("verticalLayoutBottom")
         
         # Search controls
         self.groupBoxSearch = QGroupBox(parent=self.widgetBottom)
-        self.groupBoxSearch.setObjectName("groupBoxSearch")
         self.groupBoxSearch.setTitle("Search Database")
         
         self.horizontalLayoutSearch = QHBoxLayout(self.groupBoxSearch)
-        self.horizontalLayoutSearch.setObjectName("horizontalLayoutSearch")
         
         self.lineEditSearch = QLineEdit(parent=self.groupBoxSearch)
-        self.lineEditSearch.setObjectName("lineEditSearch")
         self.lineEditSearch.setPlaceholderText("Enter search terms...")
         
         self.buttonSearch = QPushButton(parent=self.groupBoxSearch)
-        self.buttonSearch.setObjectName("buttonSearch")
         self.buttonSearch.setText("Search")
         
         self.horizontalLayoutSearch.addWidget(self.lineEditSearch)
@@ -121,25 +130,15 @@ class Ui_MainWindow(object):
         
         self.verticalLayoutBottom.addWidget(self.groupBoxSearch)
         
-        # Results table
-        self.tableResults = QTableWidget(parent=self.widgetBottom)
-        self.tableResults.setObjectName("tableResults")
-        
-        # Set up columns
-        self.tableResults.setColumnCount(8)
-        self.tableResults.setHorizontalHeaderLabels([
-            "ID", "Title", "Author", "Year", "Publisher", "Archive", "Path", "Size"
-        ])
-        
-        header = self.tableResults.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)  # ID
-        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)  # Title
-        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)  # Author
-        header.setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)  # Year
-        header.setSectionResizeMode(4, QHeaderView.ResizeMode.Stretch)  # Publisher
-        header.setSectionResizeMode(5, QHeaderView.ResizeMode.Interactive)  # Archive
-        header.setSectionResizeMode(6, QHeaderView.ResizeMode.Interactive)  # Path
-        header.setSectionResizeMode(7, QHeaderView.ResizeMode.ResizeToContents)  # Size
+        # Results table: a view over a model, so only visible cells are
+        # ever materialized. Columns and headers come from the model, and
+        # the per-column resize modes are applied in the app once the
+        # model is attached.
+        self.tableResults = SampledTableView(parent=self.widgetBottom)
+        
+        # Uniform row heights keep the view from measuring every row
+        self.tableResults.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.tableResults.verticalHeader().setDefaultSectionSize(22)
         
         self.verticalLayoutBottom.addWidget(self.tableResults)
         
@@ -150,27 +149,35 @@ class Ui_MainWindow(object):
         MainWindow.setCentralWidget(self.centralwidget)
         
         self.menubar = QMenuBar(parent=MainWindow)
-        self.menubar.setObjectName("menubar")
         self.menubar.setGeometry(QRect(0, 0, 1000, 22))
         
         self.menuFile = QMenu(parent=self.menubar)
-        self.menuFile.setObjectName("menuFile")
         self.menuFile.setTitle("File")
         
         MainWindow.setMenuBar(self.menubar)
         
         self.statusbar = QStatusBar(parent=MainWindow)
-        self.statusbar.setObjectName("statusbar")
         MainWindow.setStatusBar(self.statusbar)
         
-        self.actionOpen_Database = self.menuFile.addAction("Open Database")
-        self.actionCreate_New_Database = self.menuFile.addAction("Create New Database")
+        # Construct the actions up front (shortcuts included) and add
+        # them in one batch, so the menu emits a single change
+        self.actionOpen_Database = QAction("Open Database", MainWindow)
+        self.actionOpen_Database.setShortcut(QKeySequence.StandardKey.Open)
+        
+        self.actionCreate_New_Database = QAction("Create New Database", MainWindow)
+        self.actionCreate_New_Database.setShortcut(QKeySequence.StandardKey.New)
+        
+        self.actionExit = QAction("Exit", MainWindow)
+        self.actionExit.setShortcut(QKeySequence.StandardKey.Quit)
+        
+        self.menuFile.addActions([self.actionOpen_Database, self.actionCreate_New_Database])
         self.menuFile.addSeparator()
-        self.actionExit = self.menuFile.addAction("Exit")
+        self.menuFile.addAction(self.actionExit)
         
         self.menubar.addAction(self.menuFile.menuAction())
         
-        # Set up splitter sizes
-        self.splitter.setSizes([400, 400])
+        # Size the splitter once the window is up, so Qt doesn't
+        # compute the split twice during construction
+        QTimer.singleShot(0, lambda: self.splitter.setSizes([400, 400]))
         
-        QMetaObject.connectSlotsByName(MainWindow)
\ No newline at end of file
+        MainWindow.setUpdatesEnabled(True)
\ No newline at end of file